@@ -0,0 +1,441 @@
+"""
+Offline load test for the Flask services in scripts/.
+
+Starts the stub APIs (stubServer.py), launches each selected service with
+`flask run` pointed at the stubs (Gemini, HuggingFace, YouTube), the fake SMS
+provider (Twilio) and tiny synthetic models (Google Drive), then drives concurrent
+traffic at every endpoint and reports throughput, p50/p95/p99 latency and peak RSS.
+
+Results can be saved as a baseline and later runs compared against it; a run that
+is slower than the baseline by more than --tolerance exits with status 1.
+
+Usage:
+    python benchmarks/loadTest.py --concurrency 8 --requests 200 --save-baseline
+    python benchmarks/loadTest.py --services chatbot,fitness --latency-ms 300
+"""
+import argparse
+import importlib.util
+import io
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import psutil
+import requests
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.dirname(BENCHMARK_DIR)
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baselines.json')
+
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+
+from smsDispatcher import percentile
+from stubServer import start_stub_server
+
+CHAT_MESSAGES = [
+    "I feel really anxious about my exams",
+    "Today was a great day, I'm so happy",
+    "I'm so frustrated with work",
+    "just bored, nothing much going on"
+]
+
+FITNESS_PROFILE = {
+    'age': 32, 'gender': 'female', 'height': 165, 'weight': 62, 'activityLevel': 'moderate',
+    'fitnessLevel': 3, 'primaryGoal': 'weight loss', 'dietaryPreference': 'vegetarian'
+}
+
+INSURANCE_PROFILE = {
+    'age': 45, 'location': 'Austin, TX', 'health_status': 'type 2 diabetes', 'smoker': 'no',
+    'income_level': 'middle', 'family_status': 'married with two children'
+}
+
+
+def minimal_pdf(text):
+    """Build a one-page PDF containing `text` that PyMuPDF can extract."""
+    stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'.encode('latin-1')
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+        b'/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>',
+        b'<< /Length ' + str(len(stream)).encode() + b' >>\nstream\n' + stream + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>'
+    ]
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f'{number} 0 obj\n'.encode() + body + b'\nendobj\n')
+    xref = out.tell()
+    out.write(f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode())
+    for offset in offsets:
+        out.write(f'{offset:010d} 00000 n \n'.encode())
+    out.write(f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode())
+    return out.getvalue()
+
+
+def random_jpeg(size=(256, 256)):
+    import numpy as np
+    from PIL import Image
+
+    pixels = np.random.randint(0, 256, (*size, 3), dtype=np.uint8)
+    out = io.BytesIO()
+    Image.fromarray(pixels).save(out, format='JPEG')
+    return out.getvalue()
+
+
+REPORT_PDF = minimal_pdf('Hemoglobin 13.5 g/dL  Platelets 250000 /uL  Fasting glucose 92 mg/dL')
+_phone_numbers = itertools.count(1)
+
+
+def chat_request():
+    return {'method': 'POST', 'path': '/chat', 'json': {'message': random.choice(CHAT_MESSAGES)}}
+
+
+def fitness_request():
+    plan_type = random.choice(['diet', 'workout'])
+    return {'method': 'POST', 'path': '/generate-plan', 'json': dict(FITNESS_PROFILE, planType=plan_type)}
+
+
+def insurance_request():
+    return {'method': 'POST', 'path': '/api/health-insurance', 'json': INSURANCE_PROFILE}
+
+
+def report_request():
+    return {'method': 'POST', 'path': '/analyze-report',
+            'files': {'file': ('report.pdf', REPORT_PDF, 'application/pdf')}}
+
+
+def predict_request(model_type):
+    def build():
+        return {'method': 'POST', 'path': '/predict', 'data': {'model': model_type},
+                'files': {'image': ('scan.jpg', random_jpeg(), 'image/jpeg')}}
+    return build
+
+
+def create_reminder_request():
+    phone = f'+1555{next(_phone_numbers):07d}'
+    reminder = {'pill_name': 'Metformin', 'frequency': 2, 'times': ['08:00', '20:00'], 'days': [1, 2, 3, 4, 5, 6, 7]}
+    return {'method': 'POST', 'path': '/api/reminders', 'json': {'phone': phone, 'reminder': reminder}}
+
+
+def list_reminders_request():
+    # Passed as params so requests URL-encodes the '+'
+    return {'method': 'GET', 'path': '/api/reminders', 'params': {'phone': f'+1555{random.randint(1, 1000):07d}'}}
+
+
+# service name -> (module in scripts/, [(endpoint label, request factory)], required packages)
+SERVICES = {
+    'chatbot': ('chatbot', [('POST /chat', chat_request)], ['googleapiclient']),
+    'fitness': ('fitness', [('POST /generate-plan', fitness_request)], ['google.generativeai']),
+    'insurance': ('insurance', [('POST /api/health-insurance', insurance_request)], ['google.generativeai']),
+    'report': ('report', [('POST /analyze-report', report_request)], ['google.generativeai', 'fitz']),
+    'disease-prediction': ('disaesePrediction', [
+        ('POST /predict [eye]', predict_request('eye')),
+        ('POST /predict [chest]', predict_request('chest')),
+        ('POST /predict [brain]', predict_request('brain'))
+    ], ['tensorflow', 'PIL']),
+    'pill-reminder': ('pillRemainder', [
+        ('POST /api/reminders', create_reminder_request),
+        ('GET /api/reminders', list_reminders_request)
+    ], ['twilio'])
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class RssSampler:
+    """Samples the resident memory of a process tree on a background thread and keeps the peak."""
+
+    def __init__(self, pid, interval=0.05):
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        total = 0
+        for process in [self.process] + self.process.children(recursive=True):
+            try:
+                total += process.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        self.peak = max(self.peak, total)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+class ServiceProcess:
+    """A service started with `flask run` in `work_dir`, so its uploads and temp files stay out of the repo."""
+
+    def __init__(self, module, env, work_dir, log_path, python=sys.executable):
+        self.port = free_port()
+        self.base_url = f'http://127.0.0.1:{self.port}'
+        self.log_path = log_path
+        self._log = open(log_path, 'w')
+        self.process = subprocess.Popen(
+            [python, '-m', 'flask', '--app', module, 'run', '--port', str(self.port),
+             '--no-reload', '--no-debugger', '--with-threads'],
+            cwd=work_dir, env=env, stdout=self._log, stderr=subprocess.STDOUT
+        )
+
+    def wait_ready(self, timeout):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'exited with status {self.process.returncode}; see {self.log_path}')
+            try:
+                if requests.get(f'{self.base_url}/metrics', timeout=1).status_code == 200:
+                    return
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.5)
+        raise RuntimeError(f'not ready after {timeout}s; see {self.log_path}')
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
+
+
+def send(session, base_url, spec, timeout):
+    spec = dict(spec)
+    method = spec.pop('method')
+    path = spec.pop('path')
+    return session.request(method, base_url + path, timeout=timeout, **spec)
+
+
+def drive(service, factory, args):
+    """Run warmup requests, then `args.requests` requests from `args.concurrency` threads."""
+    with requests.Session() as session:
+        for _ in range(args.warmup):
+            send(session, service.base_url, factory(), args.timeout)
+
+    remaining = itertools.count()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    def worker():
+        with requests.Session() as session:
+            while next(remaining) < args.requests:
+                if deadline and time.perf_counter() > deadline:
+                    return
+                spec = factory()
+                started = time.perf_counter()
+                try:
+                    response = send(session, service.base_url, spec, args.timeout)
+                    ok = response.status_code < 400
+                    error = None if ok else f'HTTP {response.status_code}'
+                except requests.RequestException as e:
+                    ok, error = False, type(e).__name__
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    if not ok:
+                        errors.append(error)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    with RssSampler(service.process.pid) as rss:
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:3],
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        'peak_rss_mb': round(rss.peak / (1024 * 1024), 1)
+    }
+
+
+def service_env(stub_url, work_dir, args):
+    env = dict(os.environ)
+    env.update({
+        'GEMINI_API_KEY': 'benchmark',
+        'GEMINI_API_ENDPOINT': stub_url,
+        'HF_API_KEY': 'benchmark',
+        'HF_API_URL': f'{stub_url}/models/emotion',
+        'YOUTUBE_API_KEY': 'benchmark',
+        'YOUTUBE_API_ENDPOINT': f'{stub_url}/youtube/v3/',
+        'TWILIO_ACCOUNT_SID': 'ACbenchmark',
+        'TWILIO_AUTH_TOKEN': 'benchmark',
+        'TWILIO_PHONE_NUMBER': '+15550000000',
+        'SMS_PROVIDER': 'fake',
+        'FAKE_SMS_LATENCY_MS': str(args.latency_ms),
+        'FAKE_SMS_ERROR_RATE': str(args.error_rate),
+        'REMINDER_DB_PATH': os.path.join(work_dir, 'reminders.db'),
+        'MODEL_DIR': os.path.join(work_dir, 'models'),
+        'MIN_MODEL_SIZE_MB': '0',
+        'CUDA_VISIBLE_DEVICES': '',
+        'PYTHONPATH': os.pathsep.join(filter(None, [SCRIPTS_DIR, os.environ.get('PYTHONPATH')]))
+    })
+    return env
+
+
+def missing_packages(packages):
+    return [name for name in packages if importlib.util.find_spec(name.split('.')[0]) is None
+            or importlib.util.find_spec(name) is None]
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        if result['p95_ms'] and previous.get('p95_ms') and result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {result['p95_ms']} ms vs baseline {previous['p95_ms']} ms")
+        if result['throughput_rps'] and previous.get('throughput_rps') and \
+                result['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+            regressions.append(
+                f"{key}: throughput {result['throughput_rps']} rps vs baseline {previous['throughput_rps']} rps"
+            )
+        if result['peak_rss_mb'] > previous.get('peak_rss_mb', float('inf')) * (1 + tolerance):
+            regressions.append(f"{key}: peak RSS {result['peak_rss_mb']} MB vs baseline {previous['peak_rss_mb']} MB")
+    return regressions
+
+
+def print_table(results):
+    header = f"{'endpoint':<44} {'reqs':>6} {'errs':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'RSS MB':>8}"
+    print(header)
+    print('-' * len(header))
+    for key, r in results.items():
+        print(f"{key:<44} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps'] or 0:>8} "
+              f"{r['p50_ms'] or 0:>9} {r['p95_ms'] or 0:>9} {r['p99_ms'] or 0:>9} {r['peak_rss_mb']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--services', default=','.join(SERVICES), help='comma-separated subset of: ' + ', '.join(SERVICES))
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--duration', type=float, default=None, help='optional cap in seconds per endpoint')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--startup-timeout', type=float, default=180)
+    parser.add_argument('--latency-ms', type=float, default=100, help='stub API (and fake SMS) latency')
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of stub API calls that fail')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed regression vs baseline')
+    parser.add_argument('--output', help='also write results as JSON to this file')
+    args = parser.parse_args()
+
+    selected = [name.strip() for name in args.services.split(',') if name.strip()]
+    unknown = [name for name in selected if name not in SERVICES]
+    if unknown:
+        parser.error(f"unknown service(s): {', '.join(unknown)}")
+
+    stub = start_stub_server(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, error_rate=args.error_rate)
+    stub_url = f'http://127.0.0.1:{stub.server_port}'
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix='healthsphere-bench-') as work_dir:
+        env = service_env(stub_url, work_dir, args)
+        for name in selected:
+            module, endpoints, packages = SERVICES[name]
+            missing = missing_packages(packages)
+            if missing:
+                print(f'Skipping {name}: missing {", ".join(missing)}')
+                continue
+            if name == 'disease-prediction':
+                generated = subprocess.run(
+                    [sys.executable, os.path.join(BENCHMARK_DIR, 'syntheticModels.py'), env['MODEL_DIR']],
+                    env=env, capture_output=True, text=True
+                )
+                if generated.returncode != 0:
+                    print(f'Skipping {name}: could not build synthetic models\n{generated.stderr[-2000:]}')
+                    continue
+
+            print(f'Starting {name}...')
+            service = ServiceProcess(module, env, work_dir, os.path.join(work_dir, f'{name}.log'))
+            try:
+                service.wait_ready(args.startup_timeout)
+                for label, factory in endpoints:
+                    key = f'{name} {label}'
+                    results[key] = drive(service, factory, args)
+                    print(f"  {label}: {results[key]['throughput_rps']} rps, p95 {results[key]['p95_ms']} ms, "
+                          f"{results[key]['errors']} error(s) {results[key]['error_samples']}")
+            except RuntimeError as e:
+                print(f'  {name} failed: {e}')
+                with open(service.log_path) as log:
+                    print(''.join(log.readlines()[-20:]))
+            finally:
+                service.stop()
+
+    stub.shutdown()
+    if not results:
+        print('No services were benchmarked.')
+        return 1
+
+    print()
+    print_table(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f'\nSaved baseline to {args.baseline}')
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print('\nRegressions against baseline:')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+        print(f'\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
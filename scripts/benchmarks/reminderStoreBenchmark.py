@@ -0,0 +1,82 @@
+"""
+Benchmark for the SQLite reminder store.
+
+Inserts N synthetic reminders, then times the bulk restart load (read every row and
+heapify by next fire time, as ReminderScheduler.add_shards does for the shards it
+gains) and indexed list/update/delete operations.
+
+Usage: python benchmarks/reminderStoreBenchmark.py --count 1000000
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from reminderStore import ReminderStore
+
+
+def synthetic_rows(count, start):
+    for i in range(count):
+        hour = random.randint(6, 22)
+        reminder = {
+            'pill_name': f'pill-{i % 50}',
+            'frequency': 1,
+            'times': [f'{hour:02d}:00'],
+            'days': [1, 2, 3, 4, 5, 6, 7]
+        }
+        next_fire = start + timedelta(minutes=random.randint(1, 7 * 24 * 60))
+        yield f'+1{i:010d}', reminder, next_fire
+
+
+def timed(label, func):
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    print(f'{label:<28} {elapsed:10.3f} s')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=1000000)
+    parser.add_argument('--chunk', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ReminderStore(os.path.join(tmp, 'reminders.db'))
+        start = datetime.now()
+
+        def insert():
+            rows = synthetic_rows(args.count, start)
+            for _ in range(0, args.count, args.chunk):
+                store.add_many(row for _, row in zip(range(args.chunk), rows))
+
+        timed(f'insert {args.count} reminders', insert)
+
+        def load():
+            heap = [(entry['next_fire'], entry['id'], entry) for entry in store.iter_all()]
+            heapq.heapify(heap)
+            return heap
+
+        heap = timed('restart load + heapify', load)
+        print(f'{"loaded":<28} {len(heap):10d} rows')
+        del heap
+
+        ids = [random.randint(1, args.count) for _ in range(args.lookups)]
+        phones = [f'+1{i - 1:010d}' for i in ids]
+        timed(f'list by phone x{args.lookups}', lambda: [store.list(phone) for phone in phones])
+        timed(f'get by id x{args.lookups}', lambda: [store.get(i) for i in ids])
+        reminder = {'pill_name': 'updated', 'frequency': 1, 'times': ['09:00'], 'days': [1]}
+        timed(f'update x{args.lookups}', lambda: [store.update(i, reminder, start) for i in ids])
+        timed(f'delete x{args.lookups}', lambda: [store.delete(i) for i in ids])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Local stand-ins for the external APIs the services call: Gemini (REST transport),
+the HuggingFace emotion model and YouTube search.
+
+Every response is delayed by `latency` (+ uniform `jitter`) seconds, and a fraction
+`error_rate` of requests fail with HTTP 503. Twilio is stubbed in-process by
+SMS_PROVIDER=fake and Google Drive by pre-generated synthetic models.
+
+Usage: python benchmarks/stubServer.py --port 9100 --latency-ms 200 --error-rate 0.01
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+EMOTIONS = ['joy', 'sadness', 'anger', 'fear', 'surprise', 'disgust', 'neutral']
+
+# report.py extracts the first {...} block from the Gemini text and parses it as JSON
+GEMINI_TEXT = (
+    'Overview\nA stub plan generated for benchmarking.\n'
+    '{"Metrics": {"Hemoglobin": "13.5 g/dL"}, "Analysis": "Within normal range.", '
+    '"Recommendations": ["Routine follow-up."]}'
+)
+
+
+def gemini_response():
+    return {
+        'candidates': [{
+            'content': {'parts': [{'text': GEMINI_TEXT}], 'role': 'model'},
+            'finishReason': 'STOP',
+            'index': 0
+        }],
+        'usageMetadata': {'promptTokenCount': 200, 'candidatesTokenCount': 100, 'totalTokenCount': 300}
+    }
+
+
+def huggingface_response():
+    scores = [random.random() for _ in EMOTIONS]
+    total = sum(scores)
+    return [[{'label': label, 'score': score / total} for label, score in zip(EMOTIONS, scores)]]
+
+
+def youtube_response():
+    return {'items': [{'id': {'kind': 'youtube#video', 'videoId': f'stub{i:07d}'}} for i in range(5)]}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        config = self.server.stub_config
+        time.sleep(config['latency'] + random.uniform(0, config['jitter']))
+        if random.random() < config['error_rate']:
+            self._respond(503, {'error': {'code': 503, 'message': 'Stub overloaded'}})
+            return
+
+        path = urlparse(self.path).path
+        if path.endswith(':generateContent'):
+            self._respond(200, gemini_response())
+        elif path.startswith('/models/'):
+            self._respond(200, huggingface_response())
+        elif path.endswith('/search'):
+            self._respond(200, youtube_response())
+        else:
+            self._respond(404, {'error': f'No stub for {path}'})
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that hit their own timeout disconnect mid-response; that is expected under load
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+def start_stub_server(port=0, latency=0.0, jitter=0.0, error_rate=0.0):
+    """Start the stub server on a background thread and return it; `server.server_port` is the bound port."""
+    server = StubServer(('127.0.0.1', port), StubHandler)
+    server.stub_config = {'latency': latency, 'jitter': jitter, 'error_rate': error_rate}
+    thread = threading.Thread(target=server.serve_forever, name='stub-server', daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate)
+    print(f'Stub APIs listening on http://127.0.0.1:{server.server_port}')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Tiny stand-ins for the disease prediction models so /predict can be benchmarked
+without downloading the real weights from Google Drive.
+
+Each model has the real input size and number of classes but only a pooling and a
+dense layer. Point disaesePrediction.py at them with MODEL_DIR=<dir> MIN_MODEL_SIZE_MB=0.
+
+Usage: python benchmarks/syntheticModels.py <model_dir>
+"""
+import os
+import sys
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+# Mirrors MODEL_FILES, image_sizes and labels in disaesePrediction.py
+SYNTHETIC_MODELS = {
+    'eye': {'file': 'Vgg16(2).tflite', 'size': (128, 128), 'classes': 10},
+    'chest': {'file': 'chest_xray_model.tflite', 'size': (256, 256), 'classes': 2},
+    'brain': {'file': 'Brain_tumor_best_model.h5', 'size': (150, 150), 'classes': 4}
+}
+
+
+def build_model(size, classes):
+    import tensorflow as tf
+
+    inputs = tf.keras.Input(shape=(*size, 3))
+    pooled = tf.keras.layers.GlobalAveragePooling2D()(inputs)
+    outputs = tf.keras.layers.Dense(classes, activation='softmax')(pooled)
+    return tf.keras.Model(inputs, outputs)
+
+
+def write_synthetic_models(model_dir):
+    import tensorflow as tf
+
+    os.makedirs(model_dir, exist_ok=True)
+    for spec in SYNTHETIC_MODELS.values():
+        path = os.path.join(model_dir, spec['file'])
+        if os.path.exists(path):
+            continue
+        model = build_model(spec['size'], spec['classes'])
+        if path.endswith('.h5'):
+            model.save(path)
+        else:
+            with open(path, 'wb') as f:
+                f.write(tf.lite.TFLiteConverter.from_keras_model(model).convert())
+    return model_dir
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.exit(__doc__.strip().splitlines()[-1])
+    print(write_synthetic_models(sys.argv[1]))
@@ -6,18 +6,24 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS 
 from dotenv import load_dotenv
 import os
+from instrumentation import init_app as init_metrics, stage
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app) 
+init_metrics(app, 'chatbot')
 
-HF_API_URL = "https://api-inference.huggingface.co/models/j-hartmann/emotion-english-distilroberta-base"
+HF_API_URL = os.getenv("HF_API_URL", "https://api-inference.huggingface.co/models/j-hartmann/emotion-english-distilroberta-base")
 HF_API_KEY = os.getenv("HF_API_KEY")  # Load from .env
 headers = {"Authorization": f"Bearer {HF_API_KEY}"}
 
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")  # Load from .env
-youtube = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+YOUTUBE_API_ENDPOINT = os.getenv("YOUTUBE_API_ENDPOINT")  # Optional override, e.g. a local stub
+if YOUTUBE_API_ENDPOINT:
+    youtube = build("youtube", "v3", developerKey=YOUTUBE_API_KEY, client_options={"api_endpoint": YOUTUBE_API_ENDPOINT})
+else:
+    youtube = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
 
 mood_queries = {
     "joy": "uplifting funny videos",
@@ -115,17 +121,21 @@ def chat_endpoint():
     if user_input.lower() in ["exit", "quit", "bye"]:
         return jsonify({"response": "Bye for now!", "mood": None, "video_url": None})
 
-    mood = detect_mood(user_input)
+    with stage('model'):
+        mood = detect_mood(user_input)
     
     response = f"It seems like you’re feeling {mood}. Want to tell me more?"
 
-    video_url = fetch_youtube_video(mood)
+    with stage('external_api'):
+        video_url = fetch_youtube_video(mood)
 
-    return jsonify({
-        "response": response,
-        "mood": mood,
-        "video_url": video_url
-    })
+    with stage('serialization'):
+        result = jsonify({
+            "response": response,
+            "mood": mood,
+            "video_url": video_url
+        })
+    return result
 
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5000)
\ No newline at end of file
@@ -3,17 +3,23 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import google.generativeai as genai
 from dotenv import load_dotenv
+from instrumentation import init_app as init_metrics, stage
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app) 
+init_metrics(app, 'fitness')
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY environment variable not set")
 
-genai.configure(api_key=GEMINI_API_KEY)
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")  # Optional override, e.g. a local stub
+if GEMINI_API_ENDPOINT:
+    genai.configure(api_key=GEMINI_API_KEY, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+else:
+    genai.configure(api_key=GEMINI_API_KEY)
 
 model = genai.GenerativeModel('gemini-1.5-flash') 
 
@@ -66,10 +72,13 @@ def generate_plan():
             Format the response with clear section headers (e.g., "Overview", "Weekly Workout Plan") separated by newlines.
             """
 
-        response = model.generate_content(prompt)
-        plan = response.text 
+        with stage('model'):
+            response = model.generate_content(prompt)
+            plan = response.text 
 
-        return jsonify({'plan': plan})
+        with stage('serialization'):
+            result = jsonify({'plan': plan})
+        return result
 
     except Exception as e:
         return jsonify({'error': f'Failed to generate plan: {str(e)}'}), 500
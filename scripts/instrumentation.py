@@ -0,0 +1,249 @@
+"""
+Shared latency/throughput instrumentation for the HealthSphere Flask services.
+
+Call `init_app(app, service_name)` once per app to get:
+- http_request_duration_seconds{endpoint,method,status} histogram
+- http_requests_in_flight{endpoint} gauge
+- a Prometheus text-format `/metrics` endpoint
+- optional cProfile sampling of whole requests (METRICS_PROFILE_SAMPLE_RATE)
+
+Inside a view, wrap each phase in `with stage('model'):` to record
+stage_duration_seconds{endpoint,stage}. The services share the stage names
+upload, preprocessing, model (local inference or LLM call), external_api and
+serialization, plus service-specific ones such as model_load and store. Call
+`record_cache(name, hit)` on cache lookups. Metrics are per process; with several
+gunicorn workers each worker exposes its own counters.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds; the upper buckets cover slow LLM and OCR calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+PROFILE_SAMPLE_RATE = float(os.getenv("METRICS_PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.getenv("METRICS_PROFILE_DIR")
+
+# Only one cProfile profiler can be active per process (enable() raises otherwise on 3.12+)
+_profile_lock = threading.Lock()
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series['counts']):
+                    bucket_labels = _format_labels(self.label_names + ('le',), labels + (bound,))
+                    lines.append(f'{self.name}_bucket{bucket_labels} {count}')
+                inf_labels = _format_labels(self.label_names + ('le',), labels + ('+Inf',))
+                lines.append(f'{self.name}_bucket{inf_labels} {series["count"]}')
+                label_text = _format_labels(self.label_names, labels)
+                lines.append(f'{self.name}_sum{label_text} {series["sum"]}')
+                lines.append(f'{self.name}_count{label_text} {series["count"]}')
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self, kind='gauge'):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {kind}']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.label_names, labels)} {value}')
+        return lines
+
+
+class Counter(Gauge):
+    def render(self):
+        return super().render(kind='counter')
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint.', ('service', 'endpoint', 'method', 'status')
+)
+STAGE_DURATION = Histogram(
+    'stage_duration_seconds', 'Per-stage latency within a request.', ('service', 'endpoint', 'stage')
+)
+IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests currently being served.', ('service', 'endpoint'))
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by result.', ('service', 'cache', 'result'))
+
+_service = {'name': 'unknown'}
+
+
+def _current_endpoint():
+    if has_request_context() and request.url_rule is not None:
+        return request.url_rule.rule
+    return 'unmatched'
+
+
+def observe_stage(stage_name, seconds, endpoint=None):
+    """Record a stage duration measured elsewhere (e.g. on a background thread)."""
+    STAGE_DURATION.observe(seconds, _service['name'], endpoint or _current_endpoint(), stage_name)
+
+
+@contextmanager
+def stage(stage_name, endpoint=None):
+    """Time the enclosed block as `stage_name` of the current endpoint."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage_name, time.perf_counter() - started, endpoint)
+
+
+def record_cache(cache_name, hit):
+    CACHE_REQUESTS.inc(_service['name'], cache_name, 'hit' if hit else 'miss')
+
+
+def _cache_hit_ratios():
+    lines = ['# HELP cache_hit_ratio Fraction of cache lookups that hit.', '# TYPE cache_hit_ratio gauge']
+    totals = {}
+    with CACHE_REQUESTS._lock:
+        for (service, cache, result), count in CACHE_REQUESTS._values.items():
+            hits, lookups = totals.get((service, cache), (0, 0))
+            totals[(service, cache)] = (hits + (count if result == 'hit' else 0), lookups + count)
+    for (service, cache), (hits, lookups) in sorted(totals.items()):
+        labels = _format_labels(('service', 'cache'), (service, cache))
+        lines.append(f'cache_hit_ratio{labels} {hits / lookups if lookups else 0}')
+    return lines
+
+
+def render_metrics():
+    lines = []
+    for metric in (REQUEST_DURATION, STAGE_DURATION, IN_FLIGHT, CACHE_REQUESTS):
+        lines.extend(metric.render())
+    lines.extend(_cache_hit_ratios())
+    if psutil is not None:
+        rss = psutil.Process(os.getpid()).memory_info().rss
+        lines.extend([
+            '# HELP process_resident_memory_bytes Resident memory size in bytes.',
+            '# TYPE process_resident_memory_bytes gauge',
+            f'process_resident_memory_bytes{_format_labels(("service",), (_service["name"],))} {rss}'
+        ])
+    return '\n'.join(lines) + '\n'
+
+
+def _finish_profile(profiler, endpoint):
+    profiler.disable()
+    if PROFILE_DIR:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        safe_endpoint = endpoint.strip('/').replace('/', '_') or 'root'
+        path = os.path.join(PROFILE_DIR, f'{_service["name"]}-{safe_endpoint}-{time.time():.0f}.prof')
+        profiler.dump_stats(path)
+        logger.info(f"Saved request profile for {endpoint} to {path}")
+    else:
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(25)
+        logger.info(f"Request profile for {endpoint}:\n{stream.getvalue()}")
+
+
+def init_app(app, service_name, profile_sample_rate=None):
+    """Attach request timing, in-flight tracking, sampled profiling and /metrics to `app`."""
+    _service['name'] = service_name
+    sample_rate = PROFILE_SAMPLE_RATE if profile_sample_rate is None else profile_sample_rate
+
+    @app.before_request
+    def _start_request():
+        if request.path == '/metrics':
+            return
+        g._metrics_endpoint = _current_endpoint()
+        g._metrics_started = time.perf_counter()
+        IN_FLIGHT.inc(service_name, g._metrics_endpoint)
+        # Overlapping requests are simply not sampled while another one is being profiled
+        if sample_rate and random.random() < sample_rate and _profile_lock.acquire(blocking=False):
+            try:
+                g._metrics_profiler = cProfile.Profile()
+                g._metrics_profiler.enable()
+            except Exception:
+                g.pop('_metrics_profiler', None)
+                _profile_lock.release()
+                raise
+
+    @app.after_request
+    def _record_request(response):
+        endpoint = g.pop('_metrics_endpoint', None)
+        if endpoint is not None:
+            elapsed = time.perf_counter() - g.pop('_metrics_started')
+            REQUEST_DURATION.observe(elapsed, service_name, endpoint, request.method, str(response.status_code))
+            IN_FLIGHT.dec(service_name, endpoint)
+        return response
+
+    @app.teardown_request
+    def _teardown_request(exc):
+        # Requests that raised never reach after_request
+        endpoint = g.pop('_metrics_endpoint', None)
+        if endpoint is not None:
+            IN_FLIGHT.dec(service_name, endpoint)
+        profiler = g.pop('_metrics_profiler', None)
+        if profiler is not None:
+            try:
+                _finish_profile(profiler, endpoint or _current_endpoint())
+            except Exception as e:
+                logger.error(f"Failed to save request profile: {str(e)}")
+            finally:
+                _profile_lock.release()
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    return app
@@ -3,16 +3,22 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+from instrumentation import init_app as init_metrics, stage
 
 load_dotenv()
 
 API_KEY = os.getenv("GEMINI_API_KEY")  
-genai.configure(api_key=API_KEY)
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")  # Optional override, e.g. a local stub
+if GEMINI_API_ENDPOINT:
+    genai.configure(api_key=API_KEY, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+else:
+    genai.configure(api_key=API_KEY)
 
 model = genai.GenerativeModel('gemini-1.5-flash')
 
 app = Flask(__name__)
 CORS(app)  
+init_metrics(app, 'insurance')
 
 def get_health_insurance_recommendations(user_profile):
     """
@@ -43,8 +49,9 @@ def get_health_insurance_recommendations(user_profile):
     """
 
     try:
-        response = model.generate_content(prompt)
-        dynamic_plans = response.text
+        with stage('model'):
+            response = model.generate_content(prompt)
+            dynamic_plans = response.text
         return {"status": "success", "plans": dynamic_plans}
     except Exception as e:
         return {"status": "error", "message": f"Error calling Gemini API: {str(e)}"}
@@ -62,7 +69,9 @@ def health_insurance():
         return jsonify({"status": "error", "message": "No data provided"}), 400
     
     result = get_health_insurance_recommendations(user_profile)
-    return jsonify(result)
+    with stage('serialization'):
+        response = jsonify(result)
+    return response
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5002)
\ No newline at end of file
@@ -1,15 +1,21 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
-from datetime import datetime
-import schedule
-import time
+from datetime import datetime, timedelta
+import heapq
+import itertools
+import math
 import re
+import socket
 import threading
+import time
+import uuid
 import logging
 from dotenv import load_dotenv
 import os
+from reminderStore import ReminderStore, shard_key
+from smsDispatcher import SmsDispatcher, FakeSmsClient
+from instrumentation import init_app as init_metrics, stage
 
 load_dotenv()
 
@@ -19,11 +25,39 @@ TWILIO_CONFIG = {
     'phone_number': os.getenv("TWILIO_PHONE_NUMBER")
 }
 
+REMINDER_DB_PATH = os.getenv("REMINDER_DB_PATH", "reminders.db")
+
+# Reminders are partitioned by hashed phone number into REMINDER_SHARD_COUNT shards,
+# leased out to the scheduler processes (e.g. gunicorn workers) sharing REMINDER_DB_PATH
+SHARD_CONFIG = {
+    'shard_count': int(os.getenv("REMINDER_SHARD_COUNT", 1)),
+    'lease_seconds': float(os.getenv("REMINDER_LEASE_SECONDS", 15))
+}
+# A shard is unowned for up to a lease plus a tick when it changes hands; fires missed by
+# at most this long are still sent by the new owner instead of skipped to the next occurrence
+SHARD_CONFIG['missed_fire_grace_seconds'] = float(
+    os.getenv("REMINDER_MISSED_FIRE_GRACE_SECONDS", 2 * SHARD_CONFIG['lease_seconds'])
+)
+
+# SMS_PROVIDER=fake swaps Twilio for a local FakeSmsClient (for testing and benchmarks).
+# The rate limit applies per process, so with several workers set it to the
+# provider limit divided by the worker count.
+SMS_CONFIG = {
+    'provider': os.getenv("SMS_PROVIDER", "twilio"),
+    'workers': int(os.getenv("SMS_WORKERS", 4)),
+    'rate_per_second': float(os.getenv("SMS_RATE_PER_SECOND", 1)),
+    'burst': float(os.getenv("SMS_BURST", 1)),
+    'max_retries': int(os.getenv("SMS_MAX_RETRIES", 3)),
+    'fake_latency': float(os.getenv("FAKE_SMS_LATENCY_MS", 50)) / 1000,
+    'fake_error_rate': float(os.getenv("FAKE_SMS_ERROR_RATE", 0))
+}
+
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}}) 
+init_metrics(app, 'pill-reminder')
 
 class InputValidator:
     @staticmethod
@@ -61,61 +95,325 @@ class TwilioClient:
         self.from_number = TWILIO_CONFIG['phone_number']
 
     def send_sms(self, to_number, message):
-        try:
-            message = self.client.messages.create(
-                body=message,
-                from_=self.from_number,
-                to=to_number
-            )
-            return True
-        except TwilioRestException as e:
-            logger.error(f"Error sending SMS: {str(e)}")
-            return False
+        # TwilioRestException is left to the SmsDispatcher, which decides whether to retry
+        self.client.messages.create(
+            body=message,
+            from_=self.from_number,
+            to=to_number
+        )
+        return True
+
+MAX_WAIT_SECONDS = 60
+FIRE_RETRY_SECONDS = 5
+
+def next_fire_time(reminder_data, after):
+    """Return the first datetime strictly after `after` on which the reminder is due, or None."""
+    times = sorted(datetime.strptime(t, '%H:%M').time() for t in reminder_data['times'])
+    for offset in range(8):
+        day = after.date() + timedelta(days=offset)
+        if day.isoweekday() not in reminder_data['days']:
+            continue
+        for t in times:
+            candidate = datetime.combine(day, t)
+            if candidate > after:
+                return candidate
+    return None
 
 class ReminderScheduler:
-    
-    def __init__(self, twilio_client):
-        self.twilio = twilio_client
-        self.reminders = []
-
-    def create_reminder_job(self, reminder_data, phone_number):
-        def job():
-            current_day = datetime.now().isoweekday()
-            current_time = datetime.now().strftime("%H:%M")
-            
-            if current_day in reminder_data['days'] and current_time in reminder_data['times']:
-                message = f"Reminder: Time to take your {reminder_data['pill_name']} pill! ({current_time})"
-                success = self.twilio.send_sms(phone_number, message)
-                if success:
-                    logger.debug(f"Sent reminder for {reminder_data['pill_name']} at {current_time}")
-                else:
-                    logger.error(f"Failed to send SMS for {reminder_data['pill_name']}")
-        return job
+    """
+    Keeps every reminder in a min-heap keyed by its next fire time.
+
+    The scheduler thread sleeps until the earliest entry is due, then pops every
+    reminder due at that same instant, claims the batch in the ReminderStore and hands
+    the claimed reminders to the SmsDispatcher before pushing each back with its
+    following fire time. Updated or deleted reminders are dropped from the heap lazily
+    when they reach the top.
+
+    Only reminders whose shard (shard_key % shard_count) is in `owned_shards` are kept
+    in the heap; the ShardCoordinator adds and drops shards as leases change. Claiming
+    a fire is a compare-and-set on the stored next_fire, so a reminder never fires
+    twice even if two processes briefly both think they own its shard.
+    """
+
+    def __init__(self, dispatcher, store, shard_count=1, missed_fire_grace=0):
+        self.dispatcher = dispatcher
+        self.store = store
+        self.shard_count = shard_count
+        self.missed_fire_grace = timedelta(seconds=missed_fire_grace)
+        self.owned_shards = set()
+        self._revision = 0
+        self._entries = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def _owns(self, entry):
+        return entry['shard_key'] % self.shard_count in self.owned_shards
+
+    def _push(self, entry, fire_at):
+        if fire_at is None:
+            logger.debug(f"Reminder {entry['id']} for {entry['phone']} has no upcoming fire time")
+            return
+        with self._condition:
+            heapq.heappush(self._heap, (fire_at, next(self._counter), entry))
+            # Only wake the scheduler thread if this entry is now the earliest one
+            if self._heap[0][2] is entry:
+                self._condition.notify()
+
+    def add_shards(self, shards):
+        """
+        Take ownership of `shards` and load their reminders.
+
+        Fires missed by less than `missed_fire_grace` are kept and go out immediately; the
+        compare-and-set in claim_fires still stops them being sent twice. Older misses are
+        moved to their next occurrence.
+        """
+        if not shards:
+            return
+        if not self.owned_shards:
+            # Nothing to catch up on yet, so skip straight past the changes this load covers.
+            # Once shards are owned the cursor must stay put: moving it would skip their
+            # pending changes, and apply_changes ignores rows already loaded here.
+            self._revision = max(self._revision, self.store.max_revision())
+        self.owned_shards |= set(shards)
+        now = datetime.now()
+        heap = []
+        stale = []
+        for entry in self.store.iter_all(shards, self.shard_count):
+            fire_at = entry.pop('next_fire')
+            if fire_at is None or fire_at < now - self.missed_fire_grace:
+                fire_at = next_fire_time(entry['reminder'], now)
+                stale.append((entry['id'], fire_at))
+            self._entries[entry['id']] = entry
+            if fire_at is not None:
+                heap.append((fire_at, next(self._counter), entry))
+        if stale:
+            self.store.set_next_fire_many(stale)
+        with self._condition:
+            self._heap.extend(heap)
+            heapq.heapify(self._heap)
+            self._condition.notify()
+        logger.info(f"Loaded {len(heap)} reminder(s) for shard(s) {sorted(shards)}")
+
+    def drop_shards(self, shards):
+        """Give up `shards`; their heap entries are discarded lazily."""
+        if not shards:
+            return
+        self.owned_shards -= set(shards)
+        for reminder_id, entry in list(self._entries.items()):
+            if not self._owns(entry):
+                self._entries.pop(reminder_id, None)
+        logger.info(f"Dropped shard(s) {sorted(shards)}")
+
+    def apply_changes(self):
+        """Pick up reminders added or updated by other processes in the owned shards."""
+        if not self.owned_shards:
+            return
+        for entry in self.store.changed_since(self._revision, self.owned_shards, self.shard_count):
+            self._revision = max(self._revision, entry['revision'])
+            current = self._entries.get(entry['id'])
+            if current is not None and current['revision'] >= entry['revision']:
+                continue
+            fire_at = entry.pop('next_fire')
+            self._entries[entry['id']] = entry
+            self._push(entry, fire_at)
 
     def schedule_reminder(self, reminder_data, phone_number):
         logger.debug(f"Scheduling reminder for {phone_number}: {reminder_data}")
-        job = self.create_reminder_job(reminder_data, phone_number)
-        schedule.every(1).minutes.do(job)
-        self.reminders.append({
+        fire_at = next_fire_time(reminder_data, datetime.now())
+        reminder_id, revision = self.store.add(phone_number, reminder_data, fire_at)
+        entry = {
+            'id': reminder_id,
             'phone': phone_number,
-            'reminder': reminder_data
-        })
+            'reminder': reminder_data,
+            'shard_key': shard_key(phone_number),
+            'revision': revision
+        }
+        # Reminders in shards owned by another process are picked up by its apply_changes
+        if self._owns(entry):
+            self._entries[reminder_id] = entry
+            self._push(entry, fire_at)
         logger.debug("Reminder scheduled successfully")
+        return reminder_id
+
+    def update_reminder(self, reminder_id, reminder_data):
+        fire_at = next_fire_time(reminder_data, datetime.now())
+        revision = self.store.update(reminder_id, reminder_data, fire_at)
+        if revision is None:
+            return False
+        entry = self._entries.get(reminder_id)
+        if entry is not None:
+            new_entry = dict(entry, reminder=reminder_data, revision=revision)
+            self._entries[reminder_id] = new_entry
+            self._push(new_entry, fire_at)
+        return True
+
+    def delete_reminder(self, reminder_id):
+        self._entries.pop(reminder_id, None)
+        return self.store.delete(reminder_id)
+
+    def next_due_batch(self):
+        """Block until the earliest fire time is reached and return (fire_at, entries)."""
+        with self._condition:
+            while True:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                fire_at = self._heap[0][0]
+                delay = (fire_at - datetime.now()).total_seconds()
+                if delay > 0:
+                    # Condition.wait runs on the monotonic clock; re-check the wall clock at least
+                    # once a minute so DST changes and NTP steps don't delay a fire
+                    self._condition.wait(timeout=min(delay, MAX_WAIT_SECONDS))
+                    continue
+                batch = []
+                while self._heap and self._heap[0][0] == fire_at:
+                    entry = heapq.heappop(self._heap)[2]
+                    # Skip heap entries superseded by an update, a delete or a dropped shard
+                    if self._entries.get(entry['id']) is entry:
+                        batch.append(entry)
+                return fire_at, batch
+
+    def fire_batch(self, fire_at, batch):
+        entries = {entry['id']: entry for entry in batch}
+        claimed = self.store.claim_fires(list(entries), fire_at, next_fire_time)
+
+        # Unclaimed reminders were deleted, updated, or fired by another shard owner;
+        # apply_changes or the new owner takes them from here
+        claimed_ids = {reminder_id for reminder_id, _, _ in claimed}
+        for reminder_id, entry in entries.items():
+            if reminder_id not in claimed_ids and self._entries.get(reminder_id) is entry:
+                self._entries.pop(reminder_id, None)
+
+        current_time = fire_at.strftime("%H:%M")
+        # Coalesce every pill due at this instant for the same phone into one message
+        pills_by_phone = {}
+        for reminder_id, reminder_data, _ in claimed:
+            pills_by_phone.setdefault(entries[reminder_id]['phone'], []).append(reminder_data['pill_name'])
+        for phone_number, pills in pills_by_phone.items():
+            if len(pills) == 1:
+                message = f"Reminder: Time to take your {pills[0]} pill! ({current_time})"
+            else:
+                message = f"Reminder: Time to take your {', '.join(pills[:-1])} and {pills[-1]} pills! ({current_time})"
+            self.dispatcher.submit(phone_number, message, due_at=fire_at.timestamp())
+        logger.debug(f"Queued {len(pills_by_phone)} message(s) for {len(claimed)} reminder(s) at {current_time}")
+
+        for reminder_id, reminder_data, next_fire in claimed:
+            entry = entries[reminder_id]
+            if self._entries.get(reminder_id) is entry:
+                entry['reminder'] = reminder_data
+                self._push(entry, next_fire)
+
+    def run_forever(self):
+        while True:
+            fire_at, batch = self.next_due_batch()
+            if not batch:
+                continue
+            logger.debug(f"Firing {len(batch)} reminder(s) due at {fire_at}")
+            if not self.fire_or_requeue(fire_at, batch):
+                time.sleep(FIRE_RETRY_SECONDS)
+
+    def fire_or_requeue(self, fire_at, batch):
+        """Fire `batch`; if that fails, push it back at `fire_at` so it is retried."""
+        try:
+            self.fire_batch(fire_at, batch)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to fire reminders due at {fire_at}, retrying: {str(e)}")
+            # The claim is compare-and-set on fire_at, so a retry cannot double-send
+            for entry in batch:
+                if self._entries.get(entry['id']) is entry:
+                    self._push(entry, fire_at)
+            return False
+
+class ShardCoordinator:
+    """
+    Balances reminder shards across scheduler processes using leases in the ReminderStore.
+
+    Every tick the process heartbeats, renews the leases it holds, releases shards above
+    its fair share (shard_count / live workers, rounded up) and takes free or expired
+    leases until it reaches that share. Shards whose lease is lost are dropped from the
+    local scheduler; newly acquired shards are loaded from the store.
+    """
+
+    def __init__(self, store, scheduler, shard_count, lease_seconds):
+        self.store = store
+        self.scheduler = scheduler
+        self.shard_count = shard_count
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def rebalance(self):
+        now = time.time()
+        live_workers = max(1, self.store.heartbeat(self.owner, now, self.lease_seconds))
+        target = math.ceil(self.shard_count / live_workers)
+
+        owned = set(self.scheduler.owned_shards)
+        lost = {shard for shard in owned
+                if not self.store.acquire_lease(shard, self.owner, now, self.lease_seconds)}
+        owned -= lost
+
+        released = set()
+        while len(owned) > target:
+            shard = max(owned)
+            self.store.release_lease(shard, self.owner)
+            owned.remove(shard)
+            released.add(shard)
+
+        gained = set()
+        for shard in range(self.shard_count):
+            if len(owned) >= target:
+                break
+            if shard not in owned and self.store.acquire_lease(shard, self.owner, now, self.lease_seconds):
+                owned.add(shard)
+                gained.add(shard)
+
+        if lost:
+            logger.warning(f"Lost lease on shard(s) {sorted(lost)}")
+        self.scheduler.drop_shards(lost | released)
+        self.scheduler.add_shards(gained)
+        self.scheduler.apply_changes()
+
+    def run_forever(self):
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            try:
+                self.rebalance()
+            except Exception as e:
+                logger.error(f"Shard rebalance failed: {str(e)}")
 
 class PillReminder:
     
     def __init__(self):
         self.validator = InputValidator()
-        self.twilio = TwilioClient()
-        self.scheduler = ReminderScheduler(self.twilio)
+        if SMS_CONFIG['provider'] == 'fake':
+            self.sms_client = FakeSmsClient(SMS_CONFIG['fake_latency'], SMS_CONFIG['fake_error_rate'])
+        else:
+            self.sms_client = TwilioClient()
+        self.dispatcher = SmsDispatcher(
+            self.sms_client,
+            workers=SMS_CONFIG['workers'],
+            rate=SMS_CONFIG['rate_per_second'],
+            burst=SMS_CONFIG['burst'],
+            max_retries=SMS_CONFIG['max_retries']
+        )
+        self.store = ReminderStore(REMINDER_DB_PATH)
+        self.scheduler = ReminderScheduler(
+            self.dispatcher,
+            self.store,
+            SHARD_CONFIG['shard_count'],
+            SHARD_CONFIG['missed_fire_grace_seconds']
+        )
+        self.coordinator = ShardCoordinator(
+            self.store,
+            self.scheduler,
+            SHARD_CONFIG['shard_count'],
+            SHARD_CONFIG['lease_seconds']
+        )
+        self.coordinator.rebalance()
         self.run()
 
-    def add_reminder(self, phone_number, reminder_data):
-        logger.debug(f"Adding reminder: phone={phone_number}, data={reminder_data}")
-        
-        if not self.validator.validate_phone(phone_number):
-            return False, "Invalid phone number format. Please use format: +1234567890"
-        
+    def validate_reminder(self, reminder_data):
         if not reminder_data or not all(
             [
                 'pill_name' in reminder_data and isinstance(reminder_data['pill_name'], str) and reminder_data['pill_name'],
@@ -129,18 +427,49 @@ class PillReminder:
         if len(reminder_data['times']) != int(reminder_data['frequency']):
             return False, "Number of times must match frequency"
 
-        self.scheduler.schedule_reminder(reminder_data, phone_number)
+        return True, None
+
+    def add_reminder(self, phone_number, reminder_data):
+        logger.debug(f"Adding reminder: phone={phone_number}, data={reminder_data}")
+        
+        with stage('preprocessing'):
+            if not self.validator.validate_phone(phone_number):
+                return False, "Invalid phone number format. Please use format: +1234567890"
+
+            valid, message = self.validate_reminder(reminder_data)
+            if not valid:
+                return False, message
+
+        with stage('store'):
+            self.scheduler.schedule_reminder(reminder_data, phone_number)
         return True, "Reminder created successfully!"
 
+    def update_reminder(self, reminder_id, reminder_data):
+        logger.debug(f"Updating reminder {reminder_id}: data={reminder_data}")
+
+        valid, message = self.validate_reminder(reminder_data)
+        if not valid:
+            return False, message
+
+        if not self.scheduler.update_reminder(reminder_id, reminder_data):
+            return False, "Reminder not found"
+        return True, "Reminder updated successfully!"
+
+    def delete_reminder(self, reminder_id):
+        logger.debug(f"Deleting reminder {reminder_id}")
+        if not self.scheduler.delete_reminder(reminder_id):
+            return False, "Reminder not found"
+        return True, "Reminder deleted successfully!"
+
+    def list_reminders(self, phone_number=None, limit=100, offset=0):
+        return self.store.list(phone_number, limit=limit, offset=offset)
+
     def run(self):
         logger.info("Reminder system started. Running in background.")
-        def run_scheduler():
-            while True:
-                schedule.run_pending()
-                time.sleep(60)
-        
-        scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
+        scheduler_thread = threading.Thread(target=self.scheduler.run_forever, daemon=True)
         scheduler_thread.start()
+        coordinator_thread = threading.Thread(target=self.coordinator.run_forever, daemon=True)
+        coordinator_thread.start()
 
 # Initialize the reminder system
 reminder_system = PillReminder()
@@ -162,10 +491,58 @@ def create_reminder():
     
     if success:
         logger.info(f"Reminder created: {message}")
-        return jsonify({'message': message}), 201
+        with stage('serialization'):
+            response = jsonify({'message': message})
+        return response, 201
     else:
         logger.error(f"Reminder creation failed: {message}")
         return jsonify({'message': message}), 400
 
+@app.route('/api/reminders', methods=['GET'])
+def list_reminders():
+    phone_number = request.args.get('phone')
+    limit = request.args.get('limit', 100, type=int)
+    offset = request.args.get('offset', 0, type=int)
+
+    # SQLite treats a negative LIMIT as no limit at all
+    limit = max(1, min(limit, 1000))
+    offset = max(0, offset)
+
+    with stage('store'):
+        reminders = reminder_system.list_reminders(phone_number, limit=limit, offset=offset)
+    with stage('serialization'):
+        response = jsonify({'reminders': [{
+            'id': reminder['id'],
+            'phone': reminder['phone'],
+            'reminder': reminder['reminder'],
+            'next_fire': reminder['next_fire'].isoformat() if reminder['next_fire'] else None
+        } for reminder in reminders]})
+    return response, 200
+
+@app.route('/api/reminders/stats', methods=['GET'])
+def reminder_stats():
+    return jsonify(reminder_system.dispatcher.stats()), 200
+
+@app.route('/api/reminders/<int:reminder_id>', methods=['PUT'])
+def update_reminder(reminder_id):
+    data = request.get_json()
+    logger.debug(f"Received PUT request for reminder {reminder_id} with data: {data}")
+
+    if not data or 'reminder' not in data:
+        return jsonify({'message': 'Missing required field: reminder'}), 400
+
+    success, message = reminder_system.update_reminder(reminder_id, data['reminder'])
+    if success:
+        return jsonify({'message': message}), 200
+    status = 404 if message == "Reminder not found" else 400
+    return jsonify({'message': message}), status
+
+@app.route('/api/reminders/<int:reminder_id>', methods=['DELETE'])
+def delete_reminder(reminder_id):
+    success, message = reminder_system.delete_reminder(reminder_id)
+    if success:
+        return jsonify({'message': message}), 200
+    return jsonify({'message': message}), 404
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5003)
\ No newline at end of file
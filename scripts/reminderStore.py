@@ -0,0 +1,280 @@
+import json
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    phone TEXT NOT NULL,
+    reminder TEXT NOT NULL,
+    next_fire TEXT,
+    shard_key INTEGER NOT NULL DEFAULT 0,
+    revision INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS leases (
+    shard INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    owner TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revision_seq (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    value INTEGER NOT NULL
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_reminders_next_fire ON reminders (next_fire);
+CREATE INDEX IF NOT EXISTS idx_reminders_phone ON reminders (phone);
+CREATE INDEX IF NOT EXISTS idx_reminders_revision ON reminders (revision);
+"""
+
+COLUMNS = 'id, phone, reminder, next_fire, shard_key, revision'
+
+def shard_key(phone_number):
+    """Stable hash of a phone number; unlike hash() it is identical in every process."""
+    return zlib.crc32(phone_number.encode('utf-8'))
+
+
+def _encode_time(value):
+    return value.isoformat(timespec='seconds') if value else None
+
+
+def _decode_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _row_to_entry(row):
+    return {
+        'id': row[0],
+        'phone': row[1],
+        'reminder': json.loads(row[2]),
+        'next_fire': _decode_time(row[3]),
+        'shard_key': row[4],
+        'revision': row[5]
+    }
+
+
+def _shard_filter(shards, shard_count):
+    if shards is None:
+        return '1', ()
+    shards = sorted(shards)
+    placeholders = ', '.join('?' for _ in shards)
+    return f'shard_key % ? IN ({placeholders})', (shard_count, *shards)
+
+
+class ReminderStore:
+    """
+    Durable SQLite (WAL) store for pill reminders.
+
+    Reminders are indexed by next fire time and phone number, so listing, updating
+    and deleting never scan the whole table. A single connection is shared between
+    the Flask handlers and the scheduler thread and is guarded by a lock.
+
+    The same database file is shared by every scheduler process: each row carries a
+    stable shard_key and a revision, taken from an ever-increasing sequence on every
+    add/update, so shard owners can pick up changes made by other processes. The
+    leases/workers tables hold the shard coordination state.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.create_function('shard_key', 1, shard_key, deterministic=True)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA cache_size=-65536')
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._conn.executescript(INDEXES)
+        self._conn.commit()
+
+    def _migrate(self):
+        # Every worker opens the store at startup; the write lock makes them migrate one at a time
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(reminders)')}
+            if 'shard_key' not in columns:
+                self._conn.execute('ALTER TABLE reminders ADD COLUMN shard_key INTEGER NOT NULL DEFAULT 0')
+                self._conn.execute('ALTER TABLE reminders ADD COLUMN revision INTEGER NOT NULL DEFAULT 0')
+                self._conn.execute('UPDATE reminders SET shard_key = shard_key(phone), revision = id')
+            self._conn.execute(
+                'INSERT OR IGNORE INTO revision_seq (id, value) '
+                'SELECT 1, COALESCE(MAX(revision), 0) FROM reminders'
+            )
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            raise
+
+    def _next_revision(self):
+        # A sequence rather than MAX(revision) + 1, so a revision is never reused after a
+        # delete; the caller's transaction holds the write lock until it commits
+        self._conn.execute('UPDATE revision_seq SET value = value + 1 WHERE id = 1')
+        return self._conn.execute('SELECT value FROM revision_seq WHERE id = 1').fetchone()[0]
+
+    def add(self, phone_number, reminder_data, next_fire):
+        """Insert a reminder and return its (id, revision)."""
+        with self._lock, self._conn:
+            revision = self._next_revision()
+            cursor = self._conn.execute(
+                'INSERT INTO reminders (phone, reminder, next_fire, shard_key, revision) VALUES (?, ?, ?, ?, ?)',
+                (phone_number, json.dumps(reminder_data), _encode_time(next_fire), shard_key(phone_number), revision)
+            )
+            return cursor.lastrowid, revision
+
+    def add_many(self, rows):
+        """Insert an iterable of (phone, reminder_data, next_fire) tuples in one transaction."""
+        with self._lock, self._conn:
+            revision = self._next_revision()
+            self._conn.executemany(
+                'INSERT INTO reminders (phone, reminder, next_fire, shard_key, revision) VALUES (?, ?, ?, ?, ?)',
+                ((phone, json.dumps(data), _encode_time(fire), shard_key(phone), revision)
+                 for phone, data, fire in rows)
+            )
+
+    def get(self, reminder_id):
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT {COLUMNS} FROM reminders WHERE id = ?', (reminder_id,)
+            ).fetchone()
+        return _row_to_entry(row) if row else None
+
+    def list(self, phone_number=None, limit=100, offset=0):
+        with self._lock:
+            if phone_number:
+                rows = self._conn.execute(
+                    f'SELECT {COLUMNS} FROM reminders WHERE phone = ? '
+                    'ORDER BY id LIMIT ? OFFSET ?', (phone_number, limit, offset)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    f'SELECT {COLUMNS} FROM reminders ORDER BY id LIMIT ? OFFSET ?',
+                    (limit, offset)
+                ).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def update(self, reminder_id, reminder_data, next_fire):
+        """Replace a reminder and return its new revision, or None if it does not exist."""
+        with self._lock, self._conn:
+            revision = self._next_revision()
+            cursor = self._conn.execute(
+                'UPDATE reminders SET reminder = ?, next_fire = ?, revision = ? WHERE id = ?',
+                (json.dumps(reminder_data), _encode_time(next_fire), revision, reminder_id)
+            )
+            if cursor.rowcount == 0:
+                return None
+            return revision
+
+    def delete(self, reminder_id):
+        with self._lock, self._conn:
+            cursor = self._conn.execute('DELETE FROM reminders WHERE id = ?', (reminder_id,))
+            return cursor.rowcount > 0
+
+    def set_next_fire_many(self, updates):
+        """Persist an iterable of (reminder_id, next_fire) pairs in one transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'UPDATE reminders SET next_fire = ? WHERE id = ?',
+                ((_encode_time(fire), reminder_id) for reminder_id, fire in updates)
+            )
+
+    def claim_fires(self, reminder_ids, fire_at, next_fire_fn):
+        """
+        Atomically claim the fire at `fire_at` for each reminder and advance its next_fire.
+
+        A reminder is only claimed if its stored next_fire still equals `fire_at`, so when
+        two processes race for the same fire (e.g. during a lease handover) exactly one
+        wins. Returns a list of (id, reminder_data, next_fire) for the claimed reminders,
+        with the new fire time computed by `next_fire_fn(reminder_data, fire_at)`.
+        """
+        expected = _encode_time(fire_at)
+        claimed = []
+        with self._lock:
+            # Take the write lock up front so no other process can claim in between
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                for reminder_id in reminder_ids:
+                    row = self._conn.execute(
+                        'SELECT reminder FROM reminders WHERE id = ? AND next_fire = ?',
+                        (reminder_id, expected)
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    reminder_data = json.loads(row[0])
+                    next_fire = next_fire_fn(reminder_data, fire_at)
+                    self._conn.execute(
+                        'UPDATE reminders SET next_fire = ? WHERE id = ?',
+                        (_encode_time(next_fire), reminder_id)
+                    )
+                    claimed.append((reminder_id, reminder_data, next_fire))
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return claimed
+
+    def iter_all(self, shards=None, shard_count=1, batch_size=10000):
+        """Yield every stored reminder (optionally only the given shards) in rowid order."""
+        # A sequential table scan is much cheaper than walking the next_fire index,
+        # and callers heapify the result anyway.
+        condition, params = _shard_filter(shards, shard_count)
+        with self._lock:
+            cursor = self._conn.execute(f'SELECT {COLUMNS} FROM reminders WHERE {condition}', params)
+            rows = cursor.fetchmany(batch_size)
+        while rows:
+            for row in rows:
+                yield _row_to_entry(row)
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+
+    def changed_since(self, revision, shards=None, shard_count=1):
+        """Return reminders added or updated after `revision`, oldest change first."""
+        condition, params = _shard_filter(shards, shard_count)
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT {COLUMNS} FROM reminders WHERE revision > ? AND {condition} ORDER BY revision',
+                (revision, *params)
+            ).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def max_revision(self):
+        """Latest revision handed out; every stored row has a revision at or below it."""
+        with self._lock:
+            return self._conn.execute('SELECT value FROM revision_seq WHERE id = 1').fetchone()[0]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM reminders').fetchone()[0]
+
+    def heartbeat(self, owner, now, ttl):
+        """Register `owner` as a live worker and return how many workers are live."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO workers (owner, expires_at) VALUES (?, ?) '
+                'ON CONFLICT(owner) DO UPDATE SET expires_at = excluded.expires_at',
+                (owner, now + ttl)
+            )
+            self._conn.execute('DELETE FROM workers WHERE expires_at < ?', (now,))
+            return self._conn.execute('SELECT COUNT(*) FROM workers').fetchone()[0]
+
+    def acquire_lease(self, shard, owner, now, ttl):
+        """Take or renew the lease on `shard`; fails while another owner's lease is valid."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'INSERT INTO leases (shard, owner, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(shard) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+                'WHERE leases.owner = excluded.owner OR leases.expires_at < ?',
+                (shard, owner, now + ttl, now)
+            )
+            return cursor.rowcount > 0
+
+    def release_lease(self, shard, owner):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM leases WHERE shard = ? AND owner = ?', (shard, owner))
@@ -9,17 +9,23 @@ import pytesseract
 from PIL import Image
 import re
 from dotenv import load_dotenv
+from instrumentation import init_app as init_metrics, stage
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app) 
+init_metrics(app, 'report')
 
 tesseract_cmd = os.getenv("TESSERACT_CMD")
 if tesseract_cmd:
     pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
 
-gemini.configure(api_key=os.getenv("GEMINI_API_KEY"))
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")  # Optional override, e.g. a local stub
+if GEMINI_API_ENDPOINT:
+    gemini.configure(api_key=os.getenv("GEMINI_API_KEY"), transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+else:
+    gemini.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
 
@@ -92,21 +98,26 @@ def analyze_report():
             filename = secure_filename(file.filename)
             temp_path = os.path.join('uploads', filename)
             os.makedirs('uploads', exist_ok=True)
-            file.save(temp_path)
+            with stage('upload'):
+                file.save(temp_path)
             
             file_extension = filename.rsplit('.', 1)[1].lower()
-            if file_extension == 'pdf':
-                extracted_text = extract_text_from_pdf(temp_path)
-            else:
-                extracted_text = extract_text_from_image(temp_path)
+            with stage('preprocessing'):
+                if file_extension == 'pdf':
+                    extracted_text = extract_text_from_pdf(temp_path)
+                else:
+                    extracted_text = extract_text_from_image(temp_path)
             
-            analysis = analyze_medical_report(extracted_text)
+            with stage('model'):
+                analysis = analyze_medical_report(extracted_text)
             os.remove(temp_path)
             
-            return jsonify({
-                'analysis': analysis, 
-                'source_type': 'pdf' if file_extension == 'pdf' else 'image'
-            }), 200
+            with stage('serialization'):
+                response = jsonify({
+                    'analysis': analysis, 
+                    'source_type': 'pdf' if file_extension == 'pdf' else 'image'
+                })
+            return response, 200
                 
         else:
             return jsonify({'error': 'Invalid file type. Please upload a PDF or image (PNG/JPG/JPEG)'}), 400
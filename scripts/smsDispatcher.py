@@ -0,0 +1,162 @@
+import logging
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+from twilio.base.exceptions import TwilioRestException
+
+from instrumentation import observe_stage
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: rate limited or a provider-side failure
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Callers reserve a token up front and sleep until it would have been refilled,
+    so concurrent workers are released in order at `rate` tokens per second with
+    bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class SmsDispatcher:
+    """
+    Sends SMS messages from a queue with a pool of worker threads.
+
+    Every send takes a token from a shared TokenBucket so the pool never exceeds the
+    provider's rate limit, and TwilioRestExceptions with a retryable status are
+    retried with exponential backoff and jitter. Latency is measured from the time a
+    message was due (or enqueued) until the provider accepted it.
+    """
+
+    def __init__(self, client, workers=4, rate=1.0, burst=None, max_retries=3, backoff=1.0,
+                 latency_window=10000):
+        self.client = client
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        for i in range(workers):
+            worker = threading.Thread(target=self._worker, name=f"sms-dispatch-{i}", daemon=True)
+            worker.start()
+
+    def submit(self, to_number, message, due_at=None):
+        """Queue a message; `due_at` is the epoch time it was due, defaulting to now."""
+        self._queue.put((to_number, message, due_at or time.time()))
+
+    def join(self):
+        """Block until every queued message has been sent or given up on."""
+        self._queue.join()
+
+    def _worker(self):
+        while True:
+            to_number, message, due_at = self._queue.get()
+            try:
+                self._deliver(to_number, message, due_at)
+            except Exception as e:
+                logger.error(f"Unexpected error sending SMS to {to_number}: {str(e)}")
+                with self._lock:
+                    self.failed += 1
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, to_number, message, due_at):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            started = time.perf_counter()
+            try:
+                self.client.send_sms(to_number, message)
+                error = None
+            except TwilioRestException as e:
+                error = e
+            observe_stage('external_api', time.perf_counter() - started, endpoint='sms_dispatch')
+
+            if error is None:
+                with self._lock:
+                    self.sent += 1
+                    self._latencies.append(time.time() - due_at)
+                return
+            if error.status not in RETRYABLE_STATUSES or attempt == self.max_retries:
+                logger.error(f"Error sending SMS to {to_number}: {str(error)}")
+                with self._lock:
+                    self.failed += 1
+                return
+            delay = self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+            logger.debug(f"Retrying SMS to {to_number} in {delay:.2f}s (status {error.status})")
+            with self._lock:
+                self.retried += 1
+            time.sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counts = {'sent': self.sent, 'failed': self.failed, 'retried': self.retried}
+        return {
+            **counts,
+            'queued': self._queue.qsize(),
+            'latency_seconds': {
+                'p50': percentile(latencies, 0.50),
+                'p95': percentile(latencies, 0.95),
+                'p99': percentile(latencies, 0.99)
+            }
+        }
+
+
+class FakeSmsClient:
+    """
+    Local stand-in for TwilioClient with configurable latency and error rate.
+
+    Failures raise TwilioRestException with a 429 or 503 status so the dispatcher's
+    retry path is exercised exactly as it would be against the real provider.
+    """
+
+    def __init__(self, latency=0.05, error_rate=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.messages = deque(maxlen=10000)
+
+    def send_sms(self, to_number, message):
+        time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            status = random.choice([429, 503])
+            raise TwilioRestException(status, '/fake/Messages.json', msg=f"Fake provider error {status}")
+        self.messages.append((to_number, message))
+        logger.debug(f"Fake SMS to {to_number}: {message}")
+        return True
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+# pillRemainder starts its reminder system on import; keep it off Twilio and out of the working directory
+os.environ.setdefault('SMS_PROVIDER', 'fake')
+os.environ.setdefault('REMINDER_DB_PATH', os.path.join(tempfile.mkdtemp(), 'reminders.db'))
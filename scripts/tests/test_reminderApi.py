@@ -0,0 +1,33 @@
+import pytest
+
+from pillRemainder import app, reminder_system
+
+REMINDER = {'pill_name': 'Aspirin', 'frequency': 1, 'times': ['08:00'], 'days': [1, 2, 3, 4, 5, 6, 7]}
+PHONE = '+15559990001'
+
+
+@pytest.fixture(scope='module')
+def client():
+    for _ in range(3):
+        assert reminder_system.add_reminder(PHONE, REMINDER)[0]
+    return app.test_client()
+
+
+def test_list_returns_only_public_fields(client):
+    response = client.get('/api/reminders', query_string={'phone': PHONE})
+    assert response.status_code == 200
+    reminders = response.get_json()['reminders']
+    assert len(reminders) == 3
+    assert all(set(reminder) == {'id', 'phone', 'reminder', 'next_fire'} for reminder in reminders)
+
+
+@pytest.mark.parametrize('limit, expected', [(-1, 1), (0, 1), (2, 2), (5000, 3)])
+def test_list_limit_is_clamped(client, limit, expected):
+    response = client.get('/api/reminders', query_string={'phone': PHONE, 'limit': limit})
+    assert len(response.get_json()['reminders']) == expected
+
+
+def test_list_negative_offset_starts_at_first_row(client):
+    first = client.get('/api/reminders', query_string={'phone': PHONE}).get_json()['reminders']
+    response = client.get('/api/reminders', query_string={'phone': PHONE, 'offset': -5})
+    assert response.get_json()['reminders'] == first
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from pillRemainder import ReminderScheduler, next_fire_time
+
+EVERY_DAY = [1, 2, 3, 4, 5, 6, 7]
+# A Monday (isoweekday 1)
+MONDAY = datetime(2026, 10, 19)
+
+
+def reminder(times, days=EVERY_DAY):
+    return {'pill_name': 'Aspirin', 'frequency': len(times), 'times': times, 'days': days}
+
+
+def test_time_equal_to_after_is_skipped():
+    after = MONDAY.replace(hour=8)
+    assert next_fire_time(reminder(['08:00', '20:00']), after) == MONDAY.replace(hour=20)
+
+
+def test_last_time_of_day_rolls_over_to_tomorrow():
+    after = MONDAY.replace(hour=20)
+    assert next_fire_time(reminder(['08:00', '20:00']), after) == MONDAY.replace(hour=8) + timedelta(days=1)
+
+
+def test_wraps_into_next_week():
+    # Wednesday evening, only taken on Mondays
+    after = MONDAY + timedelta(days=2, hours=21)
+    assert next_fire_time(reminder(['08:00'], days=[1]), after) == MONDAY.replace(hour=8) + timedelta(days=7)
+
+
+def test_same_weekday_later_today_wraps_a_full_week():
+    after = MONDAY.replace(hour=9)
+    assert next_fire_time(reminder(['08:00'], days=[1]), after) == MONDAY.replace(hour=8) + timedelta(days=7)
+
+
+def test_no_days_never_fires():
+    assert next_fire_time(reminder(['08:00'], days=[]), MONDAY) is None
+
+
+def test_due_batch_groups_equal_fire_times():
+    scheduler = ReminderScheduler(dispatcher=None, store=None)
+    first = datetime.now().replace(microsecond=0) - timedelta(minutes=2)
+    second = first + timedelta(minutes=1)
+    for reminder_id, fire_at in [(1, first), (2, second), (3, first)]:
+        entry = {'id': reminder_id, 'phone': '+15550000001', 'reminder': reminder(['08:00'])}
+        scheduler._entries[reminder_id] = entry
+        scheduler._push(entry, fire_at)
+
+    fire_at, batch = scheduler.next_due_batch()
+    assert fire_at == first
+    assert sorted(entry['id'] for entry in batch) == [1, 3]
+
+    fire_at, batch = scheduler.next_due_batch()
+    assert fire_at == second
+    assert [entry['id'] for entry in batch] == [2]
+
+
+def test_due_batch_skips_superseded_entries():
+    scheduler = ReminderScheduler(dispatcher=None, store=None)
+    fire_at = datetime.now().replace(microsecond=0) - timedelta(minutes=1)
+    stale = {'id': 1, 'phone': '+15550000001', 'reminder': reminder(['08:00'])}
+    current = dict(stale)
+    scheduler._push(stale, fire_at)
+    scheduler._entries[1] = current
+    scheduler._push(current, fire_at)
+
+    assert scheduler.next_due_batch() == (fire_at, [current])
@@ -0,0 +1,175 @@
+import itertools
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from pillRemainder import ReminderScheduler, next_fire_time
+from reminderStore import ReminderStore, shard_key
+
+REMINDER = {'pill_name': 'Aspirin', 'frequency': 1, 'times': ['08:00'], 'days': [1, 2, 3, 4, 5, 6, 7]}
+
+
+class RecordingDispatcher:
+    def __init__(self):
+        self.messages = []
+
+    def submit(self, to_number, message, due_at=None):
+        self.messages.append((to_number, message))
+
+
+def phone_in_shard(shard, shard_count):
+    for i in itertools.count():
+        phone = f'+1555{i:07d}'
+        if shard_key(phone) % shard_count == shard:
+            return phone
+
+
+def live_heap_ids(scheduler):
+    return sorted(entry['id'] for _, _, entry in scheduler._heap if scheduler._entries.get(entry['id']) is entry)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'reminders.db')
+
+
+def make_scheduler(db_path, shard_count=1):
+    return ReminderScheduler(RecordingDispatcher(), ReminderStore(db_path), shard_count)
+
+
+def test_claim_race_fires_once(db_path):
+    fire_at = next_fire_time(REMINDER, datetime.now())
+    reminder_id, _ = ReminderStore(db_path).add('+15550000001', REMINDER, fire_at)
+    first, second = make_scheduler(db_path), make_scheduler(db_path)
+    # Both believe they own the shard, as during a lease handover
+    first.add_shards({0})
+    second.add_shards({0})
+    # Fire by hand instead of waiting in next_due_batch
+    first._heap.clear()
+    second._heap.clear()
+
+    barrier = threading.Barrier(2)
+
+    def fire(scheduler):
+        barrier.wait()
+        scheduler.fire_batch(fire_at, [scheduler._entries[reminder_id]])
+
+    threads = [threading.Thread(target=fire, args=(scheduler,)) for scheduler in (first, second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(first.dispatcher.messages) + len(second.dispatcher.messages) == 1
+    assert ReminderStore(db_path).get(reminder_id)['next_fire'] == next_fire_time(REMINDER, fire_at)
+    winner, loser = (first, second) if first.dispatcher.messages else (second, first)
+    assert live_heap_ids(winner) == [reminder_id]
+    assert reminder_id not in loser._entries
+
+
+def test_change_while_gaining_shard_is_not_skipped(db_path):
+    writer = ReminderStore(db_path)
+    scheduler = make_scheduler(db_path, shard_count=2)
+    scheduler.add_shards({0})
+
+    # Another process adds to both shards before the shard-1 lease is won
+    owned_id, _ = writer.add(phone_in_shard(0, 2), REMINDER, next_fire_time(REMINDER, datetime.now()))
+    gained_id, _ = writer.add(phone_in_shard(1, 2), REMINDER, next_fire_time(REMINDER, datetime.now()))
+    scheduler.add_shards({1})
+    scheduler.apply_changes()
+
+    assert set(scheduler._entries) == {owned_id, gained_id}
+    assert live_heap_ids(scheduler) == sorted([owned_id, gained_id])
+
+
+def test_fire_missed_during_handover_is_sent(db_path):
+    writer = ReminderStore(db_path)
+    now = datetime.now().replace(microsecond=0)
+    missed_at = now - timedelta(seconds=3)
+    long_missed_at = now - timedelta(hours=2)
+    missed_id, _ = writer.add('+15550000001', REMINDER, missed_at)
+    long_missed_id, _ = writer.add('+15550000002', REMINDER, long_missed_at)
+
+    scheduler = ReminderScheduler(RecordingDispatcher(), ReminderStore(db_path), missed_fire_grace=30)
+    scheduler.add_shards({0})
+
+    fire_at, batch = scheduler.next_due_batch()
+    assert fire_at == missed_at
+    assert [entry['id'] for entry in batch] == [missed_id]
+    scheduler.fire_batch(fire_at, batch)
+
+    assert [phone for phone, _ in scheduler.dispatcher.messages] == ['+15550000001']
+    assert writer.get(missed_id)['next_fire'] == next_fire_time(REMINDER, missed_at)
+    # Misses older than the grace window are skipped to their next occurrence
+    assert writer.get(long_missed_id)['next_fire'] > now
+
+
+def test_add_after_delete_gets_new_revision(db_path):
+    writer = ReminderStore(db_path)
+    scheduler = make_scheduler(db_path)
+    scheduler.add_shards({0})
+    fire_at = next_fire_time(REMINDER, datetime.now())
+
+    writer.add('+15550000001', REMINDER, fire_at)
+    deleted_id, deleted_revision = writer.add('+15550000002', REMINDER, fire_at)
+    scheduler.apply_changes()
+    assert writer.delete(deleted_id)
+
+    added_id, added_revision = writer.add('+15550000003', REMINDER, fire_at)
+    scheduler.apply_changes()
+
+    assert added_revision > deleted_revision
+    assert added_id in scheduler._entries
+
+
+def test_failed_batch_is_requeued(db_path, monkeypatch):
+    fire_at = next_fire_time(REMINDER, datetime.now())
+    reminder_id, _ = ReminderStore(db_path).add('+15550000001', REMINDER, fire_at)
+    scheduler = make_scheduler(db_path)
+    scheduler.add_shards({0})
+    batch = [scheduler._entries[reminder_id]]
+    scheduler._heap.clear()
+
+    def locked(*args):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(scheduler.store, 'claim_fires', locked)
+    assert not scheduler.fire_or_requeue(fire_at, batch)
+    assert scheduler._heap[0][0] == fire_at
+    assert live_heap_ids(scheduler) == [reminder_id]
+
+    monkeypatch.undo()
+    assert scheduler.fire_or_requeue(fire_at, batch)
+    assert len(scheduler.dispatcher.messages) == 1
+
+
+def test_concurrent_migration(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE reminders (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                 'phone TEXT NOT NULL, reminder TEXT NOT NULL, next_fire TEXT)')
+    conn.execute("INSERT INTO reminders (phone, reminder) VALUES ('+15550000001', '{}')")
+    conn.commit()
+    conn.close()
+
+    barrier = threading.Barrier(4)
+    errors = []
+
+    def open_store():
+        barrier.wait()
+        try:
+            ReminderStore(db_path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_store) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    store = ReminderStore(db_path)
+    assert store.max_revision() == 1
+    assert store.get(1)['shard_key'] == shard_key('+15550000001')
@@ -0,0 +1,94 @@
+import time
+from datetime import datetime
+
+import pytest
+from twilio.base.exceptions import TwilioRestException
+
+from pillRemainder import ReminderScheduler, next_fire_time
+from reminderStore import ReminderStore
+from smsDispatcher import FakeSmsClient, SmsDispatcher, TokenBucket
+
+
+class FailingSmsClient:
+    def __init__(self, status):
+        self.status = status
+        self.calls = 0
+
+    def send_sms(self, to_number, message):
+        self.calls += 1
+        raise TwilioRestException(self.status, '/stub/Messages.json', msg=f"Stub error {self.status}")
+
+
+class RecordingDispatcher:
+    def __init__(self):
+        self.messages = []
+
+    def submit(self, to_number, message, due_at=None):
+        self.messages.append((to_number, message))
+
+
+def make_dispatcher(client, **kwargs):
+    options = {'workers': 1, 'rate': 1000, 'burst': 1000, 'max_retries': 2, 'backoff': 0}
+    options.update(kwargs)
+    return SmsDispatcher(client, **options)
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_retryable_errors_are_retried_then_failed(status):
+    client = FailingSmsClient(status)
+    dispatcher = make_dispatcher(client)
+    dispatcher.submit('+15550000001', 'hello')
+    dispatcher.join()
+
+    stats = dispatcher.stats()
+    assert client.calls == 3
+    assert (stats['sent'], stats['failed'], stats['retried']) == (0, 1, 2)
+
+
+def test_client_error_is_not_retried():
+    client = FailingSmsClient(400)
+    dispatcher = make_dispatcher(client)
+    dispatcher.submit('+15550000001', 'hello')
+    dispatcher.join()
+
+    stats = dispatcher.stats()
+    assert client.calls == 1
+    assert (stats['sent'], stats['failed'], stats['retried']) == (0, 1, 0)
+
+
+def test_sends_stay_within_rate():
+    client = FakeSmsClient(latency=0)
+    dispatcher = make_dispatcher(client, workers=4, rate=20, burst=1)
+    started = time.monotonic()
+    for i in range(11):
+        dispatcher.submit(f'+155500000{i:02d}', 'hello')
+    dispatcher.join()
+
+    # One token up front, then 10 more at 20 per second
+    assert time.monotonic() - started >= 0.45
+    assert dispatcher.stats()['sent'] == 11
+    assert len(client.messages) == 11
+
+
+@pytest.mark.parametrize('rate', [0, -1])
+def test_non_positive_rate_is_rejected(rate):
+    with pytest.raises(ValueError):
+        TokenBucket(rate)
+
+
+def test_pills_due_together_are_one_message(tmp_path):
+    store = ReminderStore(str(tmp_path / 'reminders.db'))
+    scheduler = ReminderScheduler(RecordingDispatcher(), store)
+    scheduler.add_shards({0})
+    fire_at = None
+    for pill in ('Aspirin', 'Ibuprofen'):
+        reminder = {'pill_name': pill, 'frequency': 1, 'times': ['08:00'], 'days': [1, 2, 3, 4, 5, 6, 7]}
+        fire_at = next_fire_time(reminder, datetime.now())
+        scheduler.schedule_reminder(reminder, '+15550000001')
+    scheduler._heap.clear()
+
+    scheduler.fire_batch(fire_at, list(scheduler._entries.values()))
+
+    assert scheduler.dispatcher.messages == [
+        ('+15550000001', f"Reminder: Time to take your Aspirin and Ibuprofen pills! ({fire_at:%H:%M})")
+    ]